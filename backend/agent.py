@@ -10,18 +10,94 @@ from livekit.agents.multimodal import MultimodalAgent
 from livekit.plugins import google
 from dotenv import load_dotenv
 from api import HealthAssistantFnc
-from prompts import WELCOME_MESSAGE, INSTRUCTIONS, LOOKUP_PATIENT_MESSAGE, SYMPTOM_COLLECTION_MESSAGE, SYMPTOM_FOLLOWUP_MESSAGE, CONVERSATION_COMPLETION_MESSAGE, REPORT_GENERATION_MESSAGE
+from prompts import WELCOME_MESSAGE, SESSION_INSTRUCTIONS, LOOKUP_PATIENT_MESSAGE, PHASE_MESSAGE
 import os
+import re
+import asyncio
+from typing import Optional, Tuple
 
 load_dotenv()
 
+# Phrases that end symptom collection / confirm report generation
+_COMPLETE_RE = re.compile(r"that's all|nothing else|\bdone\b|\bcomplete(?:d)?\b|\bfinish(?:ed)?\b|end consultation", re.IGNORECASE)
+_CONFIRM_RE = re.compile(r"\byes\b|\bgenerate\b|\bcomplete(?:d)?\b|\bdone\b|\bfinish(?:ed)?\b", re.IGNORECASE)
+
+_ChatImage = llm.ChatImage
+
+# Terminal phase, entered as soon as the user confirms the report so that a repeated
+# confirmation cannot start a second end_consultation while the first is still running
+_FINISHED_PHASE = "finished"
+
+def _flatten_content(parts: list) -> str:
+    """Join the parts of a multimodal message into text, replacing images with a placeholder"""
+    return "\n".join("[image]" if type(part) is _ChatImage else part for part in parts)
+
+def _classify_intent(phase: str, content: str, symptoms: str) -> str:
+    """Classify a user turn into the intent used to pick its handler in _HANDLERS"""
+    if phase == "symptoms":
+        # Check if user wants to end consultation or continue with symptoms
+        if _COMPLETE_RE.search(content):
+            return "terminate"
+        return "continue_more" if symptoms else "continue_first"
+    if phase == "completion":
+        # Check if user confirms or wants to add more
+        return "confirm" if _CONFIRM_RE.search(content) else "more"
+    return "any"
+
+# (phase, intent) -> (next phase, builder for the system message taking (content, symptoms))
+_HANDLERS = {
+    # Patient info is complete, transition to symptom collection
+    ("info_collection", "any"): ("symptoms", lambda content, symptoms: PHASE_MESSAGE("symptom_collection", content)),
+    # User wants to complete consultation
+    ("symptoms", "terminate"): ("completion", lambda content, symptoms: PHASE_MESSAGE("completion", content)),
+    # First symptom collection
+    ("symptoms", "continue_first"): ("symptoms", lambda content, symptoms: PHASE_MESSAGE("symptoms", content)),
+    # Follow-up symptom questions
+    ("symptoms", "continue_more"): ("symptoms", lambda content, symptoms: PHASE_MESSAGE("symptom_followup", content, symptoms)),
+    # User wants to add more information, go back to symptoms
+    ("completion", "more"): ("symptoms", lambda content, symptoms: PHASE_MESSAGE("continue_symptoms", content)),
+    # User confirms completion: no message, handle_query ends the consultation itself
+    ("completion", "confirm"): (_FINISHED_PHASE, None),
+}
+
+def _is_consultation_over(phase: str, assistant_fnc: HealthAssistantFnc) -> bool:
+    """Whether the consultation has ended or is being ended, so no further turns are routed"""
+    return phase == _FINISHED_PHASE or assistant_fnc.is_consultation_complete()
+
+def select_prompt(phase: str, intent: str, content: str, symptoms: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    Choose the next conversation phase and the message to send for a user turn.
+    
+    Has no side effects, so the prompt can be computed before it is submitted
+    to the realtime session (or recomputed if the final transcript changes).
+    
+    Args:
+        phase: Current conversation phase
+        intent: Intent of the turn, as returned by _classify_intent
+        content: The user's message
+        symptoms: Symptoms recorded so far, comma separated ("" if none)
+    
+    Returns:
+        Tuple of (next phase, message role, message content); role and content
+        are None when there is no message to send
+    """
+    handler = _HANDLERS.get((phase, intent))
+    if handler is None:
+        # Default handling
+        return phase, "user", content
+    
+    next_phase, build_message = handler
+    if build_message is None:
+        return next_phase, None, None
+    return next_phase, "system", build_message(content, symptoms)
+
 async def entrypoint(ctx: JobContext):
     await ctx.connect(auto_subscribe=AutoSubscribe.SUBSCRIBE_ALL)
     await ctx.wait_for_participant()
     
     model = google.beta.realtime.RealtimeModel(
         model="gemini-2.0-flash-exp",
-        instructions=INSTRUCTIONS,
+        instructions=SESSION_INSTRUCTIONS,
         voice="Puck",
         temperature=0.8,
         
@@ -31,35 +107,35 @@ async def entrypoint(ctx: JobContext):
     assistant.start(ctx.room)
     
     session = model.sessions[0]
-    session.conversation.item.create(
-        llm.ChatMessage(
-            role="assistant",
-            content=WELCOME_MESSAGE
+    
+    def emit(role: str, content: str):
+        """Add a message to the conversation and ask the model to respond"""
+        session.conversation.item.create(
+            llm.ChatMessage(
+                role=role,
+                content=content
+            )
         )
-    )
-    session.response.create()
+        session.response.create()
+    
+    emit("assistant", WELCOME_MESSAGE)
     
     # Conversation phase tracking
-    conversation_phase = "info_collection"  # phases: info_collection, symptoms, completion
+    conversation_phase = "info_collection"  # phases: info_collection, symptoms, completion, finished
     symptoms_collected = False
+    background_tasks = set()
     
     @session.on("user_speech_committed")
     def on_user_speech_committed(msg: llm.ChatMessage):
         nonlocal conversation_phase, symptoms_collected
         
         if isinstance(msg.content, list):
-            msg.content = "\n".join("[image]" if isinstance(x, llm.ChatImage) else x for x in msg)
+            msg.content = _flatten_content(msg.content)
         
-        # Check if consultation is complete
-        if assistant_fnc.is_consultation_complete():
+        # Check if consultation is complete (or its report is being generated)
+        if _is_consultation_over(conversation_phase, assistant_fnc):
             # Consultation is already complete, just acknowledge
-            session.conversation.item.create(
-                llm.ChatMessage(
-                    role="assistant",
-                    content="Your consultation has been completed and your report has been generated. Thank you!"
-                )
-            )
-            session.response.create()
+            emit("assistant", "Your consultation has been completed and your report has been generated. Thank you!")
             return
             
         if assistant_fnc.has_patient():
@@ -68,88 +144,28 @@ async def entrypoint(ctx: JobContext):
             find_profile(msg)
         
     def find_profile(msg: llm.ChatMessage):
-        session.conversation.item.create(
-            llm.ChatMessage(
-                role="system",
-                content=LOOKUP_PATIENT_MESSAGE(msg.content)
-            )
-        )
-        session.response.create()
+        emit("system", LOOKUP_PATIENT_MESSAGE(msg.content))
         
     def handle_query(msg: llm.ChatMessage, phase: str, symptoms_collected: bool):
         nonlocal conversation_phase
         
-        # Determine conversation phase and appropriate response
-        if phase == "info_collection" and assistant_fnc.has_patient():
-            # Patient info is complete, transition to symptom collection
-            conversation_phase = "symptoms"
-            session.conversation.item.create(
-                llm.ChatMessage(
-                    role="system",
-                    content=f"{SYMPTOM_COLLECTION_MESSAGE} User message: {msg.content}"
-                )
-            )
-        elif phase == "symptoms":
-            # Check if user wants to end consultation or continue with symptoms
-            user_content = msg.content.lower()
-            if any(phrase in user_content for phrase in ["that's all", "nothing else", "done", "complete", "finish", "end consultation"]):
-                # User wants to complete consultation
-                conversation_phase = "completion"
-                session.conversation.item.create(
-                    llm.ChatMessage(
-                        role="system",
-                        content=f"{CONVERSATION_COMPLETION_MESSAGE} User message: {msg.content}"
-                    )
-                )
-            else:
-                # Continue collecting symptoms
-                current_symptoms = assistant_fnc.get_symptoms()
-                if "No symptoms" in current_symptoms:
-                    # First symptom collection
-                    session.conversation.item.create(
-                        llm.ChatMessage(
-                            role="system",
-                            content=f"Collect the patient's symptoms. User message: {msg.content}"
-                        )
-                    )
-                else:
-                    # Follow-up symptom questions
-                    session.conversation.item.create(
-                        llm.ChatMessage(
-                            role="system",
-                            content=f"{SYMPTOM_FOLLOWUP_MESSAGE(assistant_fnc._symptoms)} User message: {msg.content}"
-                        )
-                    )
-        elif phase == "completion":
-            # Handle completion phase - check if user confirms or wants to add more
-            user_content = msg.content.lower()
-            if any(phrase in user_content for phrase in ["yes", "generate", "complete", "done", "finish"]):
-                # User confirms completion, generate report
-                session.conversation.item.create(
-                    llm.ChatMessage(
-                        role="system",
-                        content=f"{REPORT_GENERATION_MESSAGE} Please call the end_consultation function to generate the report."
-                    )
-                )
-            else:
-                # User wants to add more information, go back to symptoms
-                conversation_phase = "symptoms"
-                session.conversation.item.create(
-                    llm.ChatMessage(
-                        role="system",
-                        content=f"Continue collecting symptoms or information. User message: {msg.content}"
-                    )
-                )
-        else:
-            # Default handling
-            session.conversation.item.create(
-                llm.ChatMessage(
-                    role="user",
-                    content=msg.content
-                )
-            )
+        intent = _classify_intent(phase, msg.content, assistant_fnc._symptoms_joined)
+        # The phase is updated before any task starts, so later turns see it immediately
+        conversation_phase, role, content = select_prompt(phase, intent, msg.content, assistant_fnc._symptoms_joined)
+        if conversation_phase == _FINISHED_PHASE:
+            # User confirms completion: generate the report directly rather than
+            # prompting the model to call end_consultation
+            task = asyncio.create_task(finish_consultation())
+            background_tasks.add(task)
+            task.add_done_callback(background_tasks.discard)
+            return
         
-        session.response.create()
+        emit(role, content)
+    
+    async def finish_consultation():
+        # end_consultation writes the report to disk, keep it off the event loop
+        result = await asyncio.to_thread(assistant_fnc.end_consultation)
+        emit("assistant", result)
     
 if __name__ == "__main__":
     cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
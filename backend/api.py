@@ -1,13 +1,19 @@
 from livekit.agents import llm
 import enum
-from typing import Annotated, List
+import operator
+from dataclasses import dataclass
+from typing import Annotated, List, Union
 import logging
+import threading
 from db_driver import DatabaseDriver, Patient
 from report_generator import ReportGenerator
 
 logger = logging.getLogger("user-data")
 logger.setLevel(logging.INFO)
 
+# The ai_callable functions below are plain sync functions: the agent framework
+# runs them off the event loop in a worker thread, and DatabaseDriver serialises
+# access to its shared connection, so DB calls never block the realtime session.
 DB = DatabaseDriver()
 REPORT_GEN = ReportGenerator()
 
@@ -21,29 +27,59 @@ class PatientDetails(enum.Enum):
     WEIGHT = "weight"
     
 
+@dataclass(slots=True)
+class _PatientState:
+    """Details of the patient in the current consultation (empty until known)"""
+    patient_id: str = ""
+    name: str = ""
+    age: Union[int, str] = ""
+    height: Union[float, str] = ""
+    gender: str = ""
+    blood_group: str = ""
+    weight: Union[float, str] = ""
+    
+    @classmethod
+    def from_patient(cls, patient: Patient) -> "_PatientState":
+        return cls(
+            patient_id=patient.patient_id,
+            name=patient.name,
+            age=patient.age,
+            height=patient.height,
+            gender=patient.gender,
+            blood_group=patient.blood_group,
+            weight=patient.weight
+        )
+    
+    def __getitem__(self, detail: PatientDetails):
+        return getattr(self, detail.value)
+    
+
+# Field names in PatientDetails order, and a getter returning their values as a tuple
+_PATIENT_FIELDS = tuple(detail.value for detail in PatientDetails)
+_patient_values = operator.attrgetter(*_PATIENT_FIELDS)
+
+
 class HealthAssistantFnc(llm.FunctionContext):
     def __init__(self):
         super().__init__()
         
-        self._patient_details = {
-            PatientDetails.PATIENT_ID: "",
-            PatientDetails.NAME: "",
-            PatientDetails.AGE: "",
-            PatientDetails.HEIGHT: "",
-            PatientDetails.GENDER: "",
-            PatientDetails.BLOOD_GROUP: "",
-            PatientDetails.WEIGHT: ""
-        }
+        # Guards _ending_consultation: end_consultation can be called by the agent and the model at once
+        self._end_lock = threading.Lock()
+        self.reset_state()
+    
+    def reset_state(self):
+        """Clear the patient, symptoms and completion flag for a new consultation"""
+        self._patient_details = _PatientState()
+        self._has_patient = False
         self._symptoms = []
+        self._symptoms_joined = ""  # ", ".join(self._symptoms), kept up to date by add_symptom
         self._conversation_complete = False
+        self._ending_consultation = False  # set once end_consultation starts generating the report
     
     def get_patient_str(self):
-        patient_str = ""
-        for key, value in self._patient_details.items():
-            if value:  # Only include non-empty values
-                patient_str += f"{key.value}: {value}\n"
-            
-        return patient_str
+        values = _patient_values(self._patient_details)
+        # Only include non-empty values
+        return "".join(f"{name}: {value}\n" for name, value in zip(_PATIENT_FIELDS, values) if value)
     
     @llm.ai_callable(description="lookup a patient by their patient ID")
     def lookup_patient(self, patient_id: Annotated[str, llm.TypeInfo(description="The patient ID to lookup")]):
@@ -53,15 +89,8 @@ class HealthAssistantFnc(llm.FunctionContext):
         if result is None:
             return "Patient not found"
         
-        self._patient_details = {
-            PatientDetails.PATIENT_ID: result.patient_id,
-            PatientDetails.NAME: result.name,
-            PatientDetails.AGE: result.age,
-            PatientDetails.HEIGHT: result.height,
-            PatientDetails.GENDER: result.gender,
-            PatientDetails.BLOOD_GROUP: result.blood_group,
-            PatientDetails.WEIGHT: result.weight
-        }
+        self._patient_details = _PatientState.from_patient(result)
+        self._has_patient = True
         
         return f"The patient details are: {self.get_patient_str()}"
     
@@ -86,21 +115,15 @@ class HealthAssistantFnc(llm.FunctionContext):
         if result is None:
             return "Failed to create patient"
         
-        self._patient_details = {
-            PatientDetails.PATIENT_ID: result.patient_id,
-            PatientDetails.NAME: result.name,
-            PatientDetails.AGE: result.age,
-            PatientDetails.HEIGHT: result.height,
-            PatientDetails.GENDER: result.gender,
-            PatientDetails.BLOOD_GROUP: result.blood_group,
-            PatientDetails.WEIGHT: result.weight
-        }
+        self._patient_details = _PatientState.from_patient(result)
+        self._has_patient = True
         
         return f"Patient created! Your patient ID is: {result.patient_id}"
     
     @llm.ai_callable(description="add a symptom to the patient's symptom list")
     def add_symptom(self, symptom: Annotated[str, llm.TypeInfo(description="Description of the symptom")]):
         logger.info("add symptom: %s", symptom)
+        self._symptoms_joined = f"{self._symptoms_joined}, {symptom}" if self._symptoms else symptom
         self._symptoms.append(symptom)
         return f"Symptom added: {symptom}. Total symptoms recorded: {len(self._symptoms)}"
     
@@ -124,6 +147,14 @@ class HealthAssistantFnc(llm.FunctionContext):
         if not self.has_patient():
             return "Cannot end consultation: No patient information available."
         
+        # Only the first call generates a report; later calls (e.g. a model tool call racing
+        # the agent's own end_consultation) return without writing another one
+        with self._end_lock:
+            if self._ending_consultation:
+                logger.info("end consultation already in progress or complete")
+                return "The consultation has already been completed and your diagnostic report has been generated."
+            self._ending_consultation = True
+        
         try:
             # Get current patient information
             patient = self.get_current_patient()
@@ -148,19 +179,20 @@ class HealthAssistantFnc(llm.FunctionContext):
         return self._conversation_complete
     
     def has_patient(self):
-        return self._patient_details[PatientDetails.PATIENT_ID] != ""
+        return self._has_patient
     
     def get_current_patient(self) -> Patient:
         """Get the current patient as a Patient object"""
         if not self.has_patient():
             raise ValueError("No patient information available")
         
+        details = self._patient_details
         return Patient(
-            patient_id=self._patient_details[PatientDetails.PATIENT_ID],
-            name=self._patient_details[PatientDetails.NAME],
-            age=int(self._patient_details[PatientDetails.AGE]),
-            height=float(self._patient_details[PatientDetails.HEIGHT]),
-            gender=self._patient_details[PatientDetails.GENDER],
-            blood_group=self._patient_details[PatientDetails.BLOOD_GROUP],
-            weight=float(self._patient_details[PatientDetails.WEIGHT])
+            patient_id=details.patient_id,
+            name=details.name,
+            age=int(details.age),
+            height=float(details.height),
+            gender=details.gender,
+            blood_group=details.blood_group,
+            weight=float(details.weight)
         )
\ No newline at end of file
@@ -0,0 +1,40 @@
+import sys
+from unittest.mock import Mock
+
+import pytest
+
+# Mock livekit.agents module before any test module imports api or agent.
+# conftest.py is imported once per pytest process, before test collection.
+# Tests that rely on these mocks or the fixtures below only run under pytest
+# (pip install -r requirements-dev.txt, then python -m pytest).
+mock_llm = Mock()
+mock_llm.FunctionContext = object  # Base class for HealthAssistantFnc
+mock_llm.ai_callable = lambda description: lambda func: func  # Decorator that does nothing
+mock_llm.TypeInfo = lambda description: str  # Simple type info mock
+mock_llm.ChatImage = type("ChatImage", (), {})  # A real class, so agent's type checks work
+
+mock_agents = Mock()
+mock_agents.llm = mock_llm
+
+sys.modules.setdefault('livekit', Mock())
+sys.modules.setdefault('livekit.agents', mock_agents)
+sys.modules.setdefault('livekit.agents.llm', mock_llm)
+sys.modules.setdefault('livekit.agents.multimodal', Mock())
+sys.modules.setdefault('livekit.plugins', Mock())
+
+
+@pytest.fixture(scope="session")
+def shared_db():
+    """One in-memory DatabaseDriver for the whole session, so the schema is created once"""
+    from db_driver import DatabaseDriver
+    db = DatabaseDriver(":memory:")
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def real_db(request, shared_db):
+    """Expose the shared database to the test class as real_db, emptied after each test"""
+    request.cls.real_db = shared_db
+    yield shared_db
+    shared_db.clear()
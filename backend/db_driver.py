@@ -1,11 +1,14 @@
+import os
 import sqlite3
 import random
+import threading
+from collections import OrderedDict
 from typing import Optional
 from dataclasses import dataclass
 from contextlib import contextmanager
 from datetime import datetime
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Patient:
     patient_id: str
     name: str
@@ -16,18 +19,62 @@ class Patient:
     weight: float
     created_at: Optional[datetime] = None
 
+_SELECT_PATIENT_SQL = "SELECT * FROM patients WHERE patient_id = ?"
+_INSERT_PATIENT_SQL = """INSERT INTO patients (patient_id, name, age, height, gender, blood_group, weight) 
+                   VALUES (?, ?, ?, ?, ?, ?, ?)"""
+_MAX_ID_ATTEMPTS = 5
+_PATIENT_CACHE_SIZE = 1024
+
+def _convert_timestamp(value: bytes) -> Optional[datetime]:
+    """Parse TIMESTAMP columns (e.g. created_at) into datetime objects"""
+    try:
+        return datetime.fromisoformat(value.decode())
+    except ValueError:
+        # Handle different timestamp formats if needed
+        return None
+
+sqlite3.register_converter("TIMESTAMP", _convert_timestamp)
+
 class DatabaseDriver:
     def __init__(self, db_path: str = "health_assistant.sqlite"):
         self.db_path = db_path
+        creates_file = db_path != ":memory:" and not os.path.exists(db_path)
+        # One long-lived connection shared by every call; sqlite3 caches the
+        # prepared statements for the SQL constants above on it.
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None,
+                                     detect_types=sqlite3.PARSE_DECLTYPES)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        # Most recently looked up patients, bounded to _PATIENT_CACHE_SIZE entries
+        self._cache: "OrderedDict[str, Patient]" = OrderedDict()
+        self._conn.executescript("""
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-16000;
+        """)
+        # WAL mode is stored in the database file itself, so only enable it on
+        # databases this driver creates; existing files keep their journal mode
+        if creates_file:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        # synchronous=NORMAL is only durable under WAL; other journal modes keep the FULL default
+        if self._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            self._conn.execute("PRAGMA synchronous=NORMAL")
         self._init_db()
 
     @contextmanager
     def _get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        try:
-            yield conn
-        finally:
-            conn.close()
+        with self._lock:
+            yield self._conn
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def clear(self):
+        """Delete all patients and empty the patient cache"""
+        with self._get_connection() as conn:
+            conn.execute("DELETE FROM patients")
+            self._cache.clear()
 
     def _init_db(self):
         with self._get_connection() as conn:
@@ -46,33 +93,31 @@ class DatabaseDriver:
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
-            conn.commit()
 
     def _generate_patient_id(self) -> str:
-        """Generate a unique patient ID in format P12345678"""
-        while True:
-            # Generate 8-digit random number
-            random_number = random.randint(10000000, 99999999)
-            patient_id = f"P{random_number}"
-            
-            # Check if ID already exists
-            if not self.get_patient_by_id(patient_id):
-                return patient_id
+        """Generate a random patient ID in format P12345678"""
+        # Uniqueness is enforced by the PRIMARY KEY; create_patient retries on collision
+        return f"P{random.randint(10000000, 99999999)}"
 
     def create_patient(self, name: str, age: int, height: float, gender: str, 
                       blood_group: str, weight: float, patient_id: Optional[str] = None) -> Patient:
         """Create a new patient with auto-generated ID if not provided"""
-        if not patient_id:
-            patient_id = self._generate_patient_id()
-            
+        values = (name, age, height, gender, blood_group, weight)
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                """INSERT INTO patients (patient_id, name, age, height, gender, blood_group, weight) 
-                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (patient_id, name, age, height, gender, blood_group, weight)
-            )
-            conn.commit()
+            if patient_id:
+                self._cache.pop(patient_id, None)
+                cursor.execute(_INSERT_PATIENT_SQL, (patient_id, *values))
+            else:
+                for attempt in range(_MAX_ID_ATTEMPTS):
+                    patient_id = self._generate_patient_id()
+                    try:
+                        cursor.execute(_INSERT_PATIENT_SQL, (patient_id, *values))
+                        break
+                    except sqlite3.IntegrityError:
+                        # ID collision, try another one
+                        if attempt == _MAX_ID_ATTEMPTS - 1:
+                            raise
             
             # Get the created patient with timestamp
             return self.get_patient_by_id(patient_id)
@@ -80,28 +125,29 @@ class DatabaseDriver:
     def get_patient_by_id(self, patient_id: str) -> Optional[Patient]:
         """Retrieve a patient by their patient ID"""
         with self._get_connection() as conn:
+            cached = self._cache.get(patient_id)
+            if cached is not None:
+                self._cache.move_to_end(patient_id)
+                return cached
+            
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM patients WHERE patient_id = ?", (patient_id,))
+            cursor.execute(_SELECT_PATIENT_SQL, (patient_id,))
             row = cursor.fetchone()
             if not row:
                 return None
             
-            # Parse the timestamp
-            created_at = None
-            if row[7]:  # created_at column
-                try:
-                    created_at = datetime.fromisoformat(row[7])
-                except ValueError:
-                    # Handle different timestamp formats if needed
-                    created_at = None
-            
-            return Patient(
-                patient_id=row[0],
-                name=row[1],
-                age=row[2],
-                height=row[3],
-                gender=row[4],
-                blood_group=row[5],
-                weight=row[6],
-                created_at=created_at
+            patient = Patient(
+                patient_id=row["patient_id"],
+                name=row["name"],
+                age=row["age"],
+                height=row["height"],
+                gender=row["gender"],
+                blood_group=row["blood_group"],
+                weight=row["weight"],
+                created_at=row["created_at"]  # converted by _convert_timestamp
             )
+            
+            self._cache[patient_id] = patient
+            if len(self._cache) > _PATIENT_CACHE_SIZE:
+                self._cache.popitem(last=False)
+            return patient
\ No newline at end of file
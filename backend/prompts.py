@@ -21,17 +21,24 @@ SYMPTOM_COLLECTION_MESSAGE = """
     I'll ask follow-up questions to better understand your condition.
 """
 
-SYMPTOM_FOLLOWUP_MESSAGE = lambda symptoms: f"""Based on the symptoms you've mentioned so far: {', '.join(symptoms)}, 
-                                            I'd like to gather more details. Can you tell me more about the severity, 
-                                            duration, or any patterns you've noticed with these symptoms? 
-                                            Are there any other symptoms you're experiencing?"""
-
 CONVERSATION_COMPLETION_MESSAGE = """
     Thank you for providing all this information. Is there anything else you'd like to add about your symptoms or condition? 
     If you feel we've covered everything, I can generate your initial diagnostic report now.
 """
 
-REPORT_GENERATION_MESSAGE = """
-    I'm now generating your diagnostic report based on the information and symptoms you've provided. 
-    This report will be saved for your healthcare provider to review. Thank you for using our health assistant service.
-"""
\ No newline at end of file
+# Sent once as the realtime model's instructions, so the per-turn messages below only
+# carry the phase tag and what changed; the long phase guidance is never re-sent.
+SESSION_INSTRUCTIONS = f"""{INSTRUCTIONS}
+    During the consultation you will receive system messages starting with a phase tag such as [phase=symptoms].
+    Respond to the user message that follows according to the guidance for that phase:
+    [phase=symptom_collection] {SYMPTOM_COLLECTION_MESSAGE}
+    [phase=symptoms] Collect the patient's symptoms.
+    [phase=symptom_followup] Based on the symptoms recorded so far (listed at the end of the message), 
+    gather more details. Ask about the severity, duration, or any patterns the patient has noticed with these symptoms, 
+    and whether there are any other symptoms they are experiencing.
+    [phase=completion] {CONVERSATION_COMPLETION_MESSAGE}
+    [phase=continue_symptoms] Continue collecting symptoms or information.
+"""
+
+PHASE_MESSAGE = lambda phase, msg, symptoms="": f"[phase={phase}] User message: {msg}" + (
+    f"\nSymptoms recorded so far: {symptoms}" if symptoms else "")
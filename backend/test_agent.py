@@ -0,0 +1,121 @@
+import unittest
+from unittest.mock import Mock
+from livekit.agents import llm
+from agent import _flatten_content, _classify_intent, _is_consultation_over, select_prompt
+from prompts import PHASE_MESSAGE
+
+
+class TestFlattenContent(unittest.TestCase):
+    """Test cases for joining multimodal message content into text"""
+    
+    def test_text_only(self):
+        """Test text parts are joined with newlines"""
+        self.assertEqual(_flatten_content(["first", "second"]), "first\nsecond")
+    
+    def test_images_replaced_with_placeholder(self):
+        """Test image parts become a placeholder while text parts are kept in order"""
+        parts = ["Here is my rash", llm.ChatImage(), "it itches"]
+        
+        self.assertEqual(_flatten_content(parts), "Here is my rash\n[image]\nit itches")
+    
+    def test_empty_list(self):
+        """Test an empty message flattens to an empty string"""
+        self.assertEqual(_flatten_content([]), "")
+
+
+class TestClassifyIntent(unittest.TestCase):
+    """Test cases for classifying user turns by conversation phase"""
+    
+    def test_symptoms_phase(self):
+        """Test completion phrases end symptom collection only as whole words"""
+        cases = [
+            ("I'm done", "", "terminate"),
+            ("That's all, thanks", "Headache", "terminate"),
+            ("Please END CONSULTATION", "Headache", "terminate"),
+            ("I'm finished", "", "terminate"),
+            ("I've completed my list", "Headache", "terminate"),
+            # "undone" and "completely" must not match "done" / "complete"
+            ("My stitches came undone", "", "continue_first"),
+            ("I feel completely exhausted", "Headache", "continue_more"),
+            ("I have a headache", "", "continue_first"),
+            ("I also have a fever", "Headache", "continue_more")
+        ]
+        
+        for content, symptoms, expected in cases:
+            with self.subTest(content=content, symptoms=symptoms):
+                self.assertEqual(_classify_intent("symptoms", content, symptoms), expected)
+    
+    def test_completion_phase(self):
+        """Test confirmations are matched as whole words, case-insensitively"""
+        cases = [
+            ("yes", "confirm"),
+            ("Yes, please", "confirm"),
+            ("GENERATE the report", "confirm"),
+            ("I'm done", "confirm"),
+            ("I'm finished", "confirm"),
+            ("I've completed everything", "confirm"),
+            # "yesterday" and "undone" must not count as confirmations
+            ("It started yesterday", "more"),
+            ("Something came undone", "more"),
+            ("Actually I forgot something", "more")
+        ]
+        
+        for content, expected in cases:
+            with self.subTest(content=content):
+                self.assertEqual(_classify_intent("completion", content, "Headache"), expected)
+    
+    def test_other_phases(self):
+        """Test phases without intent checks classify as 'any'"""
+        for phase in ("info_collection", "finished"):
+            with self.subTest(phase=phase):
+                self.assertEqual(_classify_intent(phase, "yes, I'm done", ""), "any")
+
+
+class TestSelectPrompt(unittest.TestCase):
+    """Test cases for choosing the next phase and message of a turn"""
+    
+    def test_handled_transitions(self):
+        """Test each handled (phase, intent) pair moves to its phase with a system message"""
+        cases = [
+            ("info_collection", "any", "symptoms", PHASE_MESSAGE("symptom_collection", "msg")),
+            ("symptoms", "terminate", "completion", PHASE_MESSAGE("completion", "msg")),
+            ("symptoms", "continue_first", "symptoms", PHASE_MESSAGE("symptoms", "msg")),
+            ("symptoms", "continue_more", "symptoms", PHASE_MESSAGE("symptom_followup", "msg", "Headache")),
+            ("completion", "more", "symptoms", PHASE_MESSAGE("continue_symptoms", "msg"))
+        ]
+        
+        for phase, intent, next_phase, content in cases:
+            with self.subTest(phase=phase, intent=intent):
+                self.assertEqual(select_prompt(phase, intent, "msg", "Headache"), (next_phase, "system", content))
+    
+    def test_unhandled_pair_passes_message_through(self):
+        """Test a (phase, intent) pair without a handler keeps the phase and forwards the user message"""
+        self.assertEqual(select_prompt("symptoms", "any", "hello", ""), ("symptoms", "user", "hello"))
+    
+    def test_confirm_finishes_without_message(self):
+        """Test confirming the report moves to the finished phase with no message to send"""
+        self.assertEqual(select_prompt("completion", "confirm", "yes", "Headache"), ("finished", None, None))
+
+
+class TestDuplicateConfirm(unittest.TestCase):
+    """Test that a repeated confirmation cannot end the consultation twice"""
+    
+    def test_second_confirm_not_routed_while_report_in_flight(self):
+        """Test the finished phase blocks further turns before end_consultation has completed"""
+        assistant_fnc = Mock()
+        assistant_fnc.is_consultation_complete.return_value = False
+        
+        # First "yes": not over yet, and routing it enters the finished phase
+        phase = "completion"
+        self.assertFalse(_is_consultation_over(phase, assistant_fnc))
+        phase, role, content = select_prompt(phase, _classify_intent(phase, "yes", "Headache"), "yes", "Headache")
+        
+        # Second "yes" arrives while the report is still being written
+        self.assertTrue(_is_consultation_over(phase, assistant_fnc))
+    
+    def test_consultation_over_once_complete(self):
+        """Test a completed consultation is over whatever the phase"""
+        assistant_fnc = Mock()
+        assistant_fnc.is_consultation_complete.return_value = True
+        
+        self.assertTrue(_is_consultation_over("completion", assistant_fnc))
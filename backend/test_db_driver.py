@@ -2,6 +2,9 @@ import unittest
 import tempfile
 import os
 from datetime import datetime
+from dataclasses import FrozenInstanceError
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
 from db_driver import DatabaseDriver, Patient
 
 
@@ -45,6 +48,22 @@ class TestPatientModel(unittest.TestCase):
         self.assertEqual(patient.patient_id, "P87654321")
         self.assertEqual(patient.name, "Jane Smith")
         self.assertIsNone(patient.created_at)
+    
+    def test_patient_is_immutable(self):
+        """Test Patient instances are frozen, so cached patients cannot be modified"""
+        patient = Patient(
+            patient_id="P13572468",
+            name="Frozen Patient",
+            age=40,
+            height=170.0,
+            gender="Female",
+            blood_group="B+",
+            weight=65.0
+        )
+        
+        with self.assertRaises(FrozenInstanceError):
+            patient.name = "Changed"
+        self.assertFalse(hasattr(patient, "__dict__"))
 
 
 class TestDatabaseDriver(unittest.TestCase):
@@ -58,6 +77,7 @@ class TestDatabaseDriver(unittest.TestCase):
     
     def tearDown(self):
         """Clean up temporary database file"""
+        self.db_driver.close()
         if os.path.exists(self.temp_db.name):
             os.unlink(self.temp_db.name)
     
@@ -74,6 +94,24 @@ class TestDatabaseDriver(unittest.TestCase):
             self.assertIsNotNone(result)
             self.assertEqual(result[0], 'patients')
     
+    def test_journal_mode(self):
+        """Test that WAL is enabled only on databases the driver creates"""
+        # The setUp database file already existed, so its journal mode is left alone
+        # and it keeps the fully durable synchronous=FULL (2)
+        with self.db_driver._get_connection() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 2)
+        
+        # A new database gets WAL, where synchronous=NORMAL (1) is safe
+        with tempfile.TemporaryDirectory() as temp_dir:
+            new_db = DatabaseDriver(os.path.join(temp_dir, "new.sqlite"))
+            try:
+                with new_db._get_connection() as conn:
+                    self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+                    self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+            finally:
+                new_db.close()
+    
     def test_patient_id_generation(self):
         """Test patient ID generation uniqueness and format"""
         # Generate multiple patient IDs
@@ -150,13 +188,48 @@ class TestDatabaseDriver(unittest.TestCase):
         self.assertEqual(retrieved_patient.gender, "Male")
         self.assertEqual(retrieved_patient.blood_group, "O-")
         self.assertEqual(retrieved_patient.weight, 75.0)
-        self.assertIsNotNone(retrieved_patient.created_at)
+        self.assertIsInstance(retrieved_patient.created_at, datetime)
     
     def test_get_patient_by_id_nonexistent(self):
         """Test retrieving a non-existent patient by ID"""
         result = self.db_driver.get_patient_by_id("P00000000")
         self.assertIsNone(result)
     
+    def test_get_patient_by_id_cached(self):
+        """Test that repeated lookups are served from the patient cache"""
+        created_patient = self.db_driver.create_patient(
+            name="Cached Patient",
+            age=31,
+            height=169.0,
+            gender="Female",
+            blood_group="A+",
+            weight=61.0
+        )
+        
+        first = self.db_driver.get_patient_by_id(created_patient.patient_id)
+        second = self.db_driver.get_patient_by_id(created_patient.patient_id)
+        
+        self.assertIs(first, second)
+        self.assertIn(created_patient.patient_id, self.db_driver._cache)
+    
+    def test_clear(self):
+        """Test clearing removes all patients, including cached ones"""
+        patient = self.db_driver.create_patient(
+            name="Cleared Patient",
+            age=52,
+            height=171.0,
+            gender="Male",
+            blood_group="AB-",
+            weight=79.0
+        )
+        self.assertIsNotNone(self.db_driver.get_patient_by_id(patient.patient_id))
+        
+        self.db_driver.clear()
+        
+        self.assertIsNone(self.db_driver.get_patient_by_id(patient.patient_id))
+        with self.db_driver._get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM patients").fetchone()[0], 0)
+    
     def test_patient_id_uniqueness_constraint(self):
         """Test that duplicate patient IDs are handled properly"""
         custom_id = "P11111111"
@@ -185,6 +258,31 @@ class TestDatabaseDriver(unittest.TestCase):
                 patient_id=custom_id
             )
     
+    def test_create_patient_retries_on_id_collision(self):
+        """Test that a generated ID colliding with an existing one is retried"""
+        existing = self.db_driver.create_patient(
+            name="Existing Patient",
+            age=50,
+            height=172.0,
+            gender="Male",
+            blood_group="A+",
+            weight=80.0,
+            patient_id="P22222222"
+        )
+        
+        with patch.object(self.db_driver, '_generate_patient_id', side_effect=[existing.patient_id, "P33333333"]):
+            patient = self.db_driver.create_patient(
+                name="New Patient",
+                age=22,
+                height=160.0,
+                gender="Female",
+                blood_group="O+",
+                weight=52.0
+            )
+        
+        self.assertEqual(patient.patient_id, "P33333333")
+        self.assertEqual(self.db_driver.get_patient_by_id(existing.patient_id).name, "Existing Patient")
+
     def test_database_crud_operations(self):
         """Test complete CRUD operations for patients"""
         # CREATE
@@ -245,6 +343,25 @@ class TestDatabaseDriver(unittest.TestCase):
             retrieved = self.db_driver.get_patient_by_id(patient.patient_id)
             self.assertIsNotNone(retrieved)
             self.assertEqual(retrieved.patient_id, patient.patient_id)
+    
+    def test_concurrent_access_from_threads(self):
+        """Test that the shared connection can be used from worker threads"""
+        def create_and_lookup(i):
+            patient = self.db_driver.create_patient(
+                name=f"Thread Patient {i}",
+                age=30 + i,
+                height=170.0,
+                gender="Female",
+                blood_group="O+",
+                weight=60.0
+            )
+            return self.db_driver.get_patient_by_id(patient.patient_id)
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            patients = list(executor.map(create_and_lookup, range(20)))
+        
+        self.assertEqual(len({patient.patient_id for patient in patients}), 20)
+        self.assertEqual([patient.name for patient in patients], [f"Thread Patient {i}" for i in range(20)])
 
 
 if __name__ == '__main__':
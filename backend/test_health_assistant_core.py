@@ -1,9 +1,5 @@
 import unittest
-import tempfile
-import os
-import shutil
-from datetime import datetime
-from db_driver import DatabaseDriver, Patient
+import pytest
 from report_generator import ReportGenerator
 import enum
 
@@ -19,6 +15,12 @@ class PatientDetails(enum.Enum):
     WEIGHT = "weight"
 
 
+# Field names in PatientDetails order; _patient_details is a list in the same order
+_ALL_DETAILS = tuple(PatientDetails)
+_FIELD_NAMES = tuple(detail.value for detail in _ALL_DETAILS)
+_DETAIL_INDEX = {detail: i for i, detail in enumerate(_ALL_DETAILS)}
+
+
 class HealthAssistantCore:
     """Core health assistant functionality without livekit dependencies for testing"""
     
@@ -26,34 +28,73 @@ class HealthAssistantCore:
         self.db = db_driver
         self.report_gen = report_generator
         
-        self._patient_details = {
-            PatientDetails.PATIENT_ID: "",
-            PatientDetails.NAME: "",
-            PatientDetails.AGE: "",
-            PatientDetails.HEIGHT: "",
-            PatientDetails.GENDER: "",
-            PatientDetails.BLOOD_GROUP: "",
-            PatientDetails.WEIGHT: ""
-        }
+        self._patient_details = [""] * len(_FIELD_NAMES)
         self._symptoms = []
         self._conversation_complete = False
     
+    def __getitem__(self, detail: PatientDetails):
+        """Get a patient detail by its PatientDetails member"""
+        return self._patient_details[_DETAIL_INDEX[detail]]
+    
     def get_patient_str(self):
-        patient_str = ""
-        for key, value in self._patient_details.items():
-            if value:  # Only include non-empty values
-                patient_str += f"{key.value}: {value}\n"
-        return patient_str
+        # Only include non-empty values
+        return "".join(f"{name}: {value}\n" for name, value in zip(_FIELD_NAMES, self._patient_details) if value)
     
     def lookup_patient(self, patient_id: str):
         result = self.db.get_patient_by_id(patient_id)
         if result is None:
             return "Patient not found"
         
-        self._patient_details = {
-            PatientDetails.PATIENT_ID: result.patient_id,
-            PatientDetails.NAME: result.name,
-            PatientDetails.AGE: result.age,
-            PatientDetails.HEIGHT: result.height,
-            PatientDetails.GENDER: result.gender,
-            PatientDetails.BLOOD_GROUP: result
\ No newline at end of file
+        self._patient_details = [
+            result.patient_id,
+            result.name,
+            result.age,
+            result.height,
+            result.gender,
+            result.blood_group,
+            result.weight
+        ]
+        
+        return f"The patient details are: {self.get_patient_str()}"
+
+
+@pytest.mark.usefixtures("real_db")
+class TestHealthAssistantCore(unittest.TestCase):
+    """Test cases for the livekit-free HealthAssistantCore"""
+    
+    def setUp(self):
+        self.core = HealthAssistantCore(self.real_db, ReportGenerator())
+    
+    def test_initial_state(self):
+        """Test that no patient details are set initially"""
+        self.assertEqual(self.core.get_patient_str(), "")
+        for detail in _ALL_DETAILS:
+            self.assertEqual(self.core[detail], "")
+    
+    def test_lookup_patient(self):
+        """Test looking up a patient fills the details in PatientDetails order"""
+        patient = self.real_db.create_patient(
+            name="Core Patient",
+            age=42,
+            height=181.0,
+            gender="Male",
+            blood_group="A+",
+            weight=77.5
+        )
+        
+        result = self.core.lookup_patient(patient.patient_id)
+        
+        self.assertEqual(self.core[PatientDetails.NAME], "Core Patient")
+        self.assertEqual(self.core[PatientDetails.AGE], 42)
+        self.assertEqual(
+            self.core.get_patient_str(),
+            f"patient_id: {patient.patient_id}\nname: Core Patient\nage: 42\nheight: 181.0\n"
+            "gender: Male\nblood_group: A+\nweight: 77.5\n"
+        )
+        self.assertEqual(result, f"The patient details are: {self.core.get_patient_str()}")
+    
+    def test_lookup_patient_not_found(self):
+        """Test looking up an unknown patient leaves the details empty"""
+        self.assertEqual(self.core.lookup_patient("P00000000"), "Patient not found")
+        self.assertEqual(self.core.get_patient_str(), "")
+
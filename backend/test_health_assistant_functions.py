@@ -1,62 +1,66 @@
 import unittest
+import copy
 import tempfile
 import os
 import shutil
-from unittest.mock import patch, MagicMock, Mock
+from unittest.mock import patch, MagicMock
 from datetime import datetime
-import sys
-
-# Mock livekit.agents module before importing api
-mock_llm = Mock()
-mock_llm.FunctionContext = object  # Base class for HealthAssistantFnc
-mock_llm.ai_callable = lambda description: lambda func: func  # Decorator that does nothing
-mock_llm.TypeInfo = lambda description: str  # Simple type info mock
-
-mock_agents = Mock()
-mock_agents.llm = mock_llm
-
-sys.modules['livekit'] = Mock()
-sys.modules['livekit.agents'] = mock_agents
-sys.modules['livekit.agents.llm'] = mock_llm
-
-from api import HealthAssistantFnc, PatientDetails
-from db_driver import DatabaseDriver, Patient
-from report_generator import ReportGenerator
+from functools import cached_property
+from pathlib import Path
+import pytest
 
 
+@pytest.mark.usefixtures("real_db")
 class TestHealthAssistantFunctions(unittest.TestCase):
     """Test cases for HealthAssistantFnc class"""
     
+    @classmethod
+    def setUpClass(cls):
+        """Create one temporary reports directory for the whole class"""
+        # Prefer the /dev/shm tmpfs where available so report writes stay in RAM
+        shm = '/dev/shm'
+        cls.temp_reports_dir = tempfile.mkdtemp(dir=shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else None)
+        
+        # Import the modules under test on first use so collection stays cheap
+        import api
+        from db_driver import Patient
+        from report_generator import ReportGenerator
+        cls.api = api
+        cls.PatientDetails = api.PatientDetails
+        cls._ALL_DETAILS = tuple(api.PatientDetails)
+        cls.Patient = Patient
+        cls.ReportGenerator = ReportGenerator
+        
+        # Construct once; each test gets a shallow copy with fresh state
+        cls._template = api.HealthAssistantFnc()
+    
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the temporary reports directory"""
+        shutil.rmtree(cls.temp_reports_dir, ignore_errors=True)
+    
     def setUp(self):
         """Set up test environment"""
-        # Create temporary database
-        self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.sqlite')
-        self.temp_db.close()
-        
-        # Create temporary reports directory
-        self.temp_reports_dir = tempfile.mkdtemp()
+        # Empty the reports directory left by the previous test
+        with os.scandir(self.temp_reports_dir) as entries:
+            for entry in entries:
+                os.unlink(entry.path)
         
-        # Patch the global DB and REPORT_GEN objects
-        self.db_patcher = patch('api.DB')
-        self.report_gen_patcher = patch('api.REPORT_GEN')
+        # Create real instances for testing; real_db is the shared in-memory DB from conftest.py
+        self.real_report_gen = self.ReportGenerator(self.temp_reports_dir)
         
-        self.mock_db = self.db_patcher.start()
-        self.mock_report_gen = self.report_gen_patcher.start()
-        
-        # Create real instances for testing
-        self.real_db = DatabaseDriver(self.temp_db.name)
-        self.real_report_gen = ReportGenerator(self.temp_reports_dir)
-        
-        # Configure mocks to use real instances
-        self.mock_db.get_patient_by_id = self.real_db.get_patient_by_id
-        self.mock_db.create_patient = self.real_db.create_patient
-        self.mock_report_gen.generate_and_save_report = self.real_report_gen.generate_and_save_report
+        # Substitute the real instances for the global DB and REPORT_GEN objects
+        for patcher in (patch('api.DB', new=self.real_db), patch('api.REPORT_GEN', new=self.real_report_gen)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
         
         # Create health assistant instance
-        self.health_assistant = HealthAssistantFnc()
-        
-        # Create sample patient data
-        self.sample_patient = self.real_db.create_patient(
+        self.health_assistant = self._new_health_assistant()
+    
+    @cached_property
+    def sample_patient(self):
+        """Sample patient, inserted only by tests that use it"""
+        return self.real_db.create_patient(
             name="John Doe",
             age=30,
             height=175.5,
@@ -65,16 +69,28 @@ class TestHealthAssistantFunctions(unittest.TestCase):
             weight=70.0
         )
     
-    def tearDown(self):
-        """Clean up test environment"""
-        self.db_patcher.stop()
-        self.report_gen_patcher.stop()
+    def _new_health_assistant(self):
+        """Copy the template assistant and give it empty consultation state"""
+        assistant = copy.copy(self._template)
+        assistant.reset_state()
+        return assistant
+    
+    def _run_consultation(self, symptoms):
+        """Add symptoms to the current patient and end the consultation
+        
+        Returns the end_consultation result and the bytes of the single report written.
+        """
+        for symptom in symptoms:
+            self.health_assistant.add_symptom(symptom)
         
-        if os.path.exists(self.temp_db.name):
-            os.unlink(self.temp_db.name)
+        result = self.health_assistant.end_consultation()
+        self.assertIn("Consultation complete!", result)
+        self.assertTrue(self.health_assistant.is_consultation_complete())
         
-        if os.path.exists(self.temp_reports_dir):
-            shutil.rmtree(self.temp_reports_dir)
+        # Verify exactly one report was created
+        report_paths = list(Path(self.temp_reports_dir).glob('*_report.txt'))
+        self.assertEqual(len(report_paths), 1)
+        return result, report_paths[0].read_bytes()
     
     def test_initial_state(self):
         """Test initial state of HealthAssistantFnc"""
@@ -83,7 +99,7 @@ class TestHealthAssistantFunctions(unittest.TestCase):
         self.assertEqual(len(self.health_assistant._symptoms), 0)
         
         # Check that all patient details are empty initially
-        for detail in PatientDetails:
+        for detail in self._ALL_DETAILS:
             self.assertEqual(self.health_assistant._patient_details[detail], "")
     
     def test_lookup_patient_existing(self):
@@ -94,9 +110,9 @@ class TestHealthAssistantFunctions(unittest.TestCase):
         self.assertTrue(self.health_assistant.has_patient())
         
         # Check that patient details are populated
-        self.assertEqual(self.health_assistant._patient_details[PatientDetails.PATIENT_ID], self.sample_patient.patient_id)
-        self.assertEqual(self.health_assistant._patient_details[PatientDetails.NAME], "John Doe")
-        self.assertEqual(self.health_assistant._patient_details[PatientDetails.AGE], 30)
+        self.assertEqual(self.health_assistant._patient_details[self.PatientDetails.PATIENT_ID], self.sample_patient.patient_id)
+        self.assertEqual(self.health_assistant._patient_details[self.PatientDetails.NAME], "John Doe")
+        self.assertEqual(self.health_assistant._patient_details[self.PatientDetails.AGE], 30)
     
     def test_lookup_patient_nonexistent(self):
         """Test looking up a non-existent patient"""
@@ -120,22 +136,20 @@ class TestHealthAssistantFunctions(unittest.TestCase):
         self.assertTrue(self.health_assistant.has_patient())
         
         # Check that patient details are populated
-        self.assertEqual(self.health_assistant._patient_details[PatientDetails.NAME], "Jane Smith")
-        self.assertEqual(self.health_assistant._patient_details[PatientDetails.AGE], 25)
-        self.assertEqual(self.health_assistant._patient_details[PatientDetails.HEIGHT], 165.0)
-        self.assertEqual(self.health_assistant._patient_details[PatientDetails.GENDER], "Female")
-        self.assertEqual(self.health_assistant._patient_details[PatientDetails.BLOOD_GROUP], "A-")
-        self.assertEqual(self.health_assistant._patient_details[PatientDetails.WEIGHT], 60.0)
+        self.assertEqual(self.health_assistant._patient_details[self.PatientDetails.NAME], "Jane Smith")
+        self.assertEqual(self.health_assistant._patient_details[self.PatientDetails.AGE], 25)
+        self.assertEqual(self.health_assistant._patient_details[self.PatientDetails.HEIGHT], 165.0)
+        self.assertEqual(self.health_assistant._patient_details[self.PatientDetails.GENDER], "Female")
+        self.assertEqual(self.health_assistant._patient_details[self.PatientDetails.BLOOD_GROUP], "A-")
+        self.assertEqual(self.health_assistant._patient_details[self.PatientDetails.WEIGHT], 60.0)
         
         # Patient ID should be generated and not empty
-        self.assertNotEqual(self.health_assistant._patient_details[PatientDetails.PATIENT_ID], "")
+        self.assertNotEqual(self.health_assistant._patient_details[self.PatientDetails.PATIENT_ID], "")
     
     def test_create_patient_database_failure(self):
         """Test handling of database failure during patient creation"""
         # Mock database to return None (failure)
-        with patch.object(self.real_db, 'create_patient', return_value=None):
-            self.mock_db.create_patient = self.real_db.create_patient
-            
+        with patch.object(self.api.DB, 'create_patient', return_value=None):
             result = self.health_assistant.create_patient(
                 name="Test Patient",
                 age=30,
@@ -148,25 +162,35 @@ class TestHealthAssistantFunctions(unittest.TestCase):
             self.assertEqual(result, "Failed to create patient")
             self.assertFalse(self.health_assistant.has_patient())
     
-    def test_get_patient_details_with_patient(self):
-        """Test getting patient details when patient exists"""
-        # First lookup a patient
-        self.health_assistant.lookup_patient(self.sample_patient.patient_id)
-        
-        result = self.health_assistant.get_patient_details()
-        
-        self.assertIn("The patient details are:", result)
-        self.assertIn("patient_id: " + self.sample_patient.patient_id, result)
-        self.assertIn("name: John Doe", result)
-    
-    def test_get_patient_details_no_patient(self):
-        """Test getting patient details when no patient exists"""
-        result = self.health_assistant.get_patient_details()
+    def test_patient_strings(self):
+        """Test patient details and string formatting with and without a patient"""
+        cases = [
+            (True, frozenset([
+                "patient_id: " + self.sample_patient.patient_id,
+                "name: John Doe",
+                "age: 30",
+                "height: 175.5",
+                "gender: Male",
+                "blood_group: O+",
+                "weight: 70.0"
+            ])),
+            # No patient: details should not contain any actual patient information
+            (False, frozenset())
+        ]
         
-        # Should return empty details
-        self.assertIn("The patient details are:", result)
-        # Should not contain any actual patient information
-        self.assertNotIn("John Doe", result)
+        for lookup, expected_lines in cases:
+            with self.subTest(lookup=lookup):
+                health_assistant = self._new_health_assistant()
+                if lookup:
+                    health_assistant.lookup_patient(self.sample_patient.patient_id)
+                
+                patient_str = health_assistant.get_patient_str()
+                result = health_assistant.get_patient_details()
+                
+                self.assertEqual(result, f"The patient details are: {patient_str}")
+                self.assertTrue(expected_lines.issubset(patient_str.splitlines()))
+                if not expected_lines:
+                    self.assertEqual(patient_str, "")
     
     def test_add_symptom(self):
         """Test adding symptoms to the patient"""
@@ -185,42 +209,53 @@ class TestHealthAssistantFunctions(unittest.TestCase):
         self.assertEqual(len(self.health_assistant._symptoms), 2)
         self.assertIn(symptom1, self.health_assistant._symptoms)
         self.assertIn(symptom2, self.health_assistant._symptoms)
+        self.assertEqual(self.health_assistant._symptoms_joined, "Headache for 2 days, Mild fever")
     
-    def test_get_symptoms_with_symptoms(self):
-        """Test getting symptoms when symptoms exist"""
-        # Add some symptoms first
-        self.health_assistant.add_symptom("Headache")
-        self.health_assistant.add_symptom("Fever")
-        self.health_assistant.add_symptom("Fatigue")
-        
-        result = self.health_assistant.get_symptoms()
-        
-        self.assertIn("Recorded symptoms:", result)
-        self.assertIn("1. Headache", result)
-        self.assertIn("2. Fever", result)
-        self.assertIn("3. Fatigue", result)
-    
-    def test_get_symptoms_no_symptoms(self):
-        """Test getting symptoms when no symptoms exist"""
-        result = self.health_assistant.get_symptoms()
+    def test_get_symptoms(self):
+        """Test getting symptoms with and without recorded symptoms"""
+        cases = [
+            (["Headache", "Fever", "Fatigue"], "Recorded symptoms:\n1. Headache\n2. Fever\n3. Fatigue\n"),
+            ([], "No symptoms have been recorded yet.")
+        ]
         
-        self.assertEqual(result, "No symptoms have been recorded yet.")
+        for symptoms, expected in cases:
+            with self.subTest(symptoms=symptoms):
+                health_assistant = self._new_health_assistant()
+                for symptom in symptoms:
+                    health_assistant.add_symptom(symptom)
+                
+                result = health_assistant.get_symptoms()
+                
+                self.assertEqual(health_assistant._symptoms, symptoms)
+                self.assertEqual(result, expected)
     
     def test_end_consultation_success(self):
         """Test successful consultation completion with report generation"""
         # Setup patient and symptoms
         self.health_assistant.lookup_patient(self.sample_patient.patient_id)
-        self.health_assistant.add_symptom("Headache")
-        self.health_assistant.add_symptom("Fever")
         
-        result = self.health_assistant.end_consultation()
+        result, report_content = self._run_consultation(["Headache", "Fever"])
         
-        self.assertIn("Consultation complete!", result)
         self.assertIn("diagnostic report has been generated", result)
-        self.assertTrue(self.health_assistant.is_consultation_complete())
+        self.assertIn(b"John Doe", report_content)
+        self.assertIn(b"Headache", report_content)
+        self.assertIn(b"Fever", report_content)
+    
+    def test_end_consultation_twice_writes_one_report(self):
+        """Test that ending the consultation again does not generate a second report"""
+        self.health_assistant.lookup_patient(self.sample_patient.patient_id)
         
-        # Check that report was actually generated
-        self.assertTrue(any("report.txt" in f for f in os.listdir(self.temp_reports_dir)))
+        # Both calls usually land in the same second and so the same filename,
+        # so also count the calls to the report generator
+        report_gen = self.api.REPORT_GEN
+        with patch.object(report_gen, 'generate_and_save_report', wraps=report_gen.generate_and_save_report) as generate:
+            first, _ = self._run_consultation(["Headache"])
+            second = self.health_assistant.end_consultation()
+        
+        self.assertIn("Consultation complete!", first)
+        self.assertIn("already been completed", second)
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(len(list(Path(self.temp_reports_dir).glob('*_report.txt'))), 1)
     
     def test_end_consultation_no_patient(self):
         """Test ending consultation without patient information"""
@@ -235,9 +270,7 @@ class TestHealthAssistantFunctions(unittest.TestCase):
         self.health_assistant.lookup_patient(self.sample_patient.patient_id)
         
         # Mock report generation to fail
-        with patch.object(self.real_report_gen, 'generate_and_save_report', side_effect=Exception("File system error")):
-            self.mock_report_gen.generate_and_save_report = self.real_report_gen.generate_and_save_report
-            
+        with patch.object(self.api.REPORT_GEN, 'generate_and_save_report', side_effect=Exception("File system error")):
             result = self.health_assistant.end_consultation()
             
             self.assertIn("Consultation marked as complete", result)
@@ -245,14 +278,14 @@ class TestHealthAssistantFunctions(unittest.TestCase):
             self.assertIn("File system error", result)
             self.assertTrue(self.health_assistant.is_consultation_complete())
     
-    def test_has_patient_true(self):
-        """Test has_patient returns True when patient exists"""
-        self.health_assistant.lookup_patient(self.sample_patient.patient_id)
-        self.assertTrue(self.health_assistant.has_patient())
-    
-    def test_has_patient_false(self):
-        """Test has_patient returns False when no patient exists"""
-        self.assertFalse(self.health_assistant.has_patient())
+    def test_has_patient(self):
+        """Test has_patient with and without a looked-up patient"""
+        for do_lookup, expected in ((True, True), (False, False)):
+            with self.subTest(do_lookup=do_lookup):
+                health_assistant = self._new_health_assistant()
+                if do_lookup:
+                    health_assistant.lookup_patient(self.sample_patient.patient_id)
+                self.assertEqual(health_assistant.has_patient(), expected)
     
     def test_get_current_patient_success(self):
         """Test getting current patient as Patient object"""
@@ -261,7 +294,7 @@ class TestHealthAssistantFunctions(unittest.TestCase):
         
         current_patient = self.health_assistant.get_current_patient()
         
-        self.assertIsInstance(current_patient, Patient)
+        self.assertIsInstance(current_patient, self.Patient)
         self.assertEqual(current_patient.patient_id, self.sample_patient.patient_id)
         self.assertEqual(current_patient.name, "John Doe")
         self.assertEqual(current_patient.age, 30)
@@ -277,28 +310,6 @@ class TestHealthAssistantFunctions(unittest.TestCase):
         
         self.assertIn("No patient information available", str(context.exception))
     
-    def test_get_patient_str_with_data(self):
-        """Test patient string formatting with patient data"""
-        # Setup patient
-        self.health_assistant.lookup_patient(self.sample_patient.patient_id)
-        
-        patient_str = self.health_assistant.get_patient_str()
-        
-        self.assertIn("patient_id: " + self.sample_patient.patient_id, patient_str)
-        self.assertIn("name: John Doe", patient_str)
-        self.assertIn("age: 30", patient_str)
-        self.assertIn("height: 175.5", patient_str)
-        self.assertIn("gender: Male", patient_str)
-        self.assertIn("blood_group: O+", patient_str)
-        self.assertIn("weight: 70.0", patient_str)
-    
-    def test_get_patient_str_empty(self):
-        """Test patient string formatting with no patient data"""
-        patient_str = self.health_assistant.get_patient_str()
-        
-        # Should be empty or contain only empty values
-        self.assertEqual(patient_str.strip(), "")
-    
     def test_conversation_flow_integration(self):
         """Test complete conversation flow from patient creation to report generation"""
         # Step 1: Create patient
@@ -313,32 +324,17 @@ class TestHealthAssistantFunctions(unittest.TestCase):
         self.assertIn("Patient created!", create_result)
         self.assertTrue(self.health_assistant.has_patient())
         
-        # Step 2: Add symptoms
-        self.health_assistant.add_symptom("Persistent cough")
-        self.health_assistant.add_symptom("Shortness of breath")
-        self.health_assistant.add_symptom("Chest pain")
+        # Steps 2 and 3: Add symptoms, end consultation and generate report
+        end_result, report_content = self._run_consultation(["Persistent cough", "Shortness of breath", "Chest pain"])
         
         symptoms_result = self.health_assistant.get_symptoms()
         self.assertIn("3. Chest pain", symptoms_result)
         
-        # Step 3: End consultation and generate report
-        end_result = self.health_assistant.end_consultation()
-        self.assertIn("Consultation complete!", end_result)
-        self.assertTrue(self.health_assistant.is_consultation_complete())
-        
-        # Verify report was created
-        report_files = [f for f in os.listdir(self.temp_reports_dir) if f.endswith('_report.txt')]
-        self.assertEqual(len(report_files), 1)
-        
         # Check report content
-        report_path = os.path.join(self.temp_reports_dir, report_files[0])
-        with open(report_path, 'r', encoding='utf-8') as file:
-            report_content = file.read()
-        
-        self.assertIn("Integration Test Patient", report_content)
-        self.assertIn("Persistent cough", report_content)
-        self.assertIn("Shortness of breath", report_content)
-        self.assertIn("Chest pain", report_content)
+        self.assertIn(b"Integration Test Patient", report_content)
+        self.assertIn(b"Persistent cough", report_content)
+        self.assertIn(b"Shortness of breath", report_content)
+        self.assertIn(b"Chest pain", report_content)
     
     def test_multiple_symptom_additions(self):
         """Test adding multiple symptoms and retrieving them in order"""
@@ -351,16 +347,18 @@ class TestHealthAssistantFunctions(unittest.TestCase):
         ]
         
         # Add all symptoms
-        for i, symptom in enumerate(symptoms):
+        for i, symptom in enumerate(symptoms, 1):
             result = self.health_assistant.add_symptom(symptom)
-            self.assertIn(f"Total symptoms recorded: {i + 1}", result)
+            self.assertIn(f"Total symptoms recorded: {i}", result)
+        self.assertEqual(self.health_assistant._symptoms_joined, ", ".join(symptoms))
         
         # Get all symptoms
         result = self.health_assistant.get_symptoms()
         
         # Check that all symptoms are present in order
-        for i, symptom in enumerate(symptoms):
-            self.assertIn(f"{i + 1}. {symptom}", result)
+        self.assertEqual(self.health_assistant._symptoms, symptoms)
+        self.assertTrue(result.startswith("Recorded symptoms:"))
+        self.assertEqual(result.count("\n"), len(symptoms) + 1)
     
     def test_patient_lookup_after_creation(self):
         """Test that a created patient can be looked up by ID"""
@@ -375,18 +373,16 @@ class TestHealthAssistantFunctions(unittest.TestCase):
         )
         
         # Extract patient ID from result
-        patient_id = self.health_assistant._patient_details[PatientDetails.PATIENT_ID]
+        patient_id = self.health_assistant._patient_details[self.PatientDetails.PATIENT_ID]
         
         # Clear the assistant state
-        self.health_assistant = HealthAssistantFnc()
+        self.health_assistant.reset_state()
+        self.assertFalse(self.health_assistant.has_patient())
         
         # Lookup the created patient
         lookup_result = self.health_assistant.lookup_patient(patient_id)
         
         self.assertIn("The patient details are:", lookup_result)
         self.assertTrue(self.health_assistant.has_patient())
-        self.assertEqual(self.health_assistant._patient_details[PatientDetails.NAME], "Lookup Test Patient")
-
+        self.assertEqual(self.health_assistant._patient_details[self.PatientDetails.NAME], "Lookup Test Patient")
 
-if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file